@@ -1,63 +1,30 @@
 # ai_code_generator.py
 import openai
+import httpx
+import io
 import os
 import json
+import time
+import atexit
 import logging
+import threading
+from collections import OrderedDict
 from flask import jsonify, request
 
-class AICodeGenerator:
-    def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        self.setup_openai()
-        
-    def setup_openai(self):
-        """Setup OpenAI client"""
-        try:
-            if self.api_key:
-                openai.api_key = self.api_key
-            else:
-                logging.warning("OpenAI API key not found")
-        except Exception as e:
-            logging.error(f"OpenAI setup error: {e}")
-    
-    def generate_code(self, prompt, language='python', context=''):
-        """Generate code using AI"""
-        try:
-            if not self.api_key:
-                return self.generate_fallback_code(prompt, language)
-            
-            full_prompt = f"""
-            Context: {context}
-            Language: {language}
-            Requirement: {prompt}
-            
-            Please generate clean, efficient code with proper comments.
-            Return only the code without explanations.
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert programmer."},
-                    {"role": "user", "content": full_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            
-            generated_code = response.choices[0].message.content.strip()
-            return {'status': 'success', 'code': generated_code, 'ai_used': True}
-            
-        except Exception as e:
-            logging.error(f"AI Code Generation Error: {e}")
-            # Fallback to template-based generation
-            return self.generate_fallback_code(prompt, language)
-    
-    def generate_fallback_code(self, prompt, language):
-        """Fallback code generation without AI"""
-        templates = {
-            'python': {
-                'calculator': '''
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Optional: local embedding model for the semantic generation cache
+try:
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = np is not None
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+# Fallback code templates (used when no OpenAI API key is configured)
+PYTHON_CALCULATOR = '''
 def calculator(a, b, operation):
     """Simple calculator function"""
     if operation == 'add':
@@ -70,8 +37,9 @@ def calculator(a, b, operation):
         return a / b if b != 0 else "Error: Division by zero"
     else:
         return "Error: Invalid operation"
-''',
-                'file_processor': '''
+'''
+
+PYTHON_FILE_PROCESSOR = '''
 def process_file(filename):
     """Process file and return content"""
     try:
@@ -83,9 +51,8 @@ def process_file(filename):
     except Exception as e:
         return f"Error: {str(e)}"
 '''
-            },
-            'javascript': {
-                'calculator': '''
+
+JAVASCRIPT_CALCULATOR = '''
 function calculator(a, b, operation) {
     switch(operation) {
         case 'add':
@@ -100,8 +67,9 @@ function calculator(a, b, operation) {
             return "Error: Invalid operation";
     }
 }
-''',
-                'api_handler': '''
+'''
+
+JAVASCRIPT_API_HANDLER = '''
 async function fetchData(url) {
     try {
         const response = await fetch(url);
@@ -113,26 +81,223 @@ async function fetchData(url) {
     }
 }
 '''
+
+# Flat (language, template) lookup for the fallback generator
+_TEMPLATES = {
+    ('python', 'calculator'): PYTHON_CALCULATOR,
+    ('python', 'file_processor'): PYTHON_FILE_PROCESSOR,
+    ('javascript', 'calculator'): JAVASCRIPT_CALCULATOR,
+    ('javascript', 'api_handler'): JAVASCRIPT_API_HANDLER,
+}
+
+def long_lines(code, max_length):
+    """Return (line_number, length) for every line longer than max_length"""
+    if np is None:
+        return [(i, len(line)) for i, line in enumerate(code.split('\n'), 1) if len(line) > max_length]
+    # UTF-32 gives one array element per character; line lengths are the
+    # gaps between newline offsets, so the scan stays inside numpy
+    chars = np.frombuffer(code.encode('utf-32-le'), dtype=np.uint32)
+    newlines = np.flatnonzero(chars == 0x0A)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(chars)]))
+    lengths = ends - starts
+    return [(int(i) + 1, int(lengths[i])) for i in np.flatnonzero(lengths > max_length)]
+
+class SemanticCache:
+    """Persistent cache of AI generations matched by prompt embedding similarity"""
+
+    # Rewriting the file (every embedding) per generation is costly; save in batches
+    SAVE_EVERY = 20
+    SAVE_INTERVAL = 60.0  # seconds
+
+    def __init__(self, cache_file='ai_generation_cache.json', threshold=0.92,
+                 max_entries=1000, model_name='all-MiniLM-L6-v2'):
+        self.cache_file = cache_file
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self.enabled = SEMANTIC_CACHE_AVAILABLE
+        self._model = None
+        self._keys = []
+        self._matrix = None  # stacked normalized embeddings of _keys, rebuilt lazily
+        self.entries = OrderedDict()  # cache key -> entry, oldest first (LRU)
+        self._lock = threading.RLock()  # guards entries, _keys and _matrix
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        if self.enabled:
+            self._load()
+            atexit.register(self.flush)
+
+    def _load(self):
+        """Load cached generations from disk"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                for entry in json.load(f):
+                    entry['embedding'] = np.asarray(entry['embedding'], dtype=np.float32)
+                    self.entries[self._key(entry['language'], entry['prompt'])] = entry
+        except Exception as e:
+            logging.error(f"Semantic cache load error: {e}")
+
+    def flush(self):
+        """Write pending generations to disk"""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def _save(self):
+        """Persist cached generations to disk"""
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        try:
+            data = [dict(entry, embedding=entry['embedding'].tolist()) for entry in self.entries.values()]
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except Exception as e:
+            logging.error(f"Semantic cache save error: {e}")
+
+    @staticmethod
+    def _key(language, prompt):
+        return f"{language}\n{prompt}"
+
+    def _embed(self, text):
+        """Return a unit-length embedding so dot product == cosine similarity"""
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, prompt, language):
+        """Return (cached response or None, prompt embedding) for the most similar prompt
+
+        Pass the embedding on to add() after a miss so the prompt is embedded once.
+        """
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            if not self.entries:
+                return None, None
+        embedding = self._embed(self._key(language, prompt))
+        with self._lock:
+            if self._matrix is None:
+                self._keys = list(self.entries)
+                self._matrix = np.stack([self.entries[k]['embedding'] for k in self._keys])
+            scores = self._matrix @ embedding
+            # Only compare against generations for the same language
+            for idx in np.argsort(scores)[::-1]:
+                if scores[idx] < self.threshold:
+                    break
+                entry = self.entries[self._keys[idx]]
+                if entry['language'] == language:
+                    self.entries.move_to_end(self._keys[idx])
+                    return entry['response'], embedding
+        return None, embedding
+
+    def add(self, prompt, language, response, embedding=None):
+        """Store a new generation, evicting the least recently used entry"""
+        if not self.enabled:
+            return
+        key = self._key(language, prompt)
+        if embedding is None:
+            embedding = self._embed(key)
+        with self._lock:
+            self.entries[key] = {
+                'prompt': prompt,
+                'language': language,
+                'response': response,
+                'embedding': embedding
             }
-        }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._matrix = None
+            self._unsaved += 1
+            if (self._unsaved >= self.SAVE_EVERY
+                    or time.monotonic() - self._last_save >= self.SAVE_INTERVAL):
+                self._save()
+
+class AICodeGenerator:
+    def __init__(self):
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        self.semantic_cache = SemanticCache()
+        self.setup_openai()
         
+    def setup_openai(self):
+        """Setup OpenAI client (one pooled HTTP connection reused across calls)"""
+        self.client = None
+        try:
+            if self.api_key:
+                limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+                try:
+                    http_client = httpx.Client(http2=True, limits=limits)
+                except ImportError:
+                    # HTTP/2 needs the optional 'h2' package; keep-alive still applies
+                    http_client = httpx.Client(limits=limits)
+                self.client = openai.OpenAI(api_key=self.api_key, http_client=http_client)
+            else:
+                logging.warning("OpenAI API key not found")
+        except Exception as e:
+            logging.error(f"OpenAI setup error: {e}")
+    
+    def generate_code(self, prompt, language='python', context=''):
+        """Generate code using AI"""
+        try:
+            if not self.client:
+                return self.generate_fallback_code(prompt, language)
+
+            # Paraphrased prompts reuse an earlier generation
+            cache_query = f"{context}\n{prompt}" if context else prompt
+            cached_code, prompt_embedding = self.semantic_cache.lookup(cache_query, language)
+            if cached_code is not None:
+                return {'status': 'success', 'code': cached_code, 'ai_used': True, 'cache': 'semantic'}
+
+            full_prompt = f"""
+            Context: {context}
+            Language: {language}
+            Requirement: {prompt}
+            
+            Please generate clean, efficient code with proper comments.
+            Return only the code without explanations.
+            """
+            
+            response = self.client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are an expert programmer."},
+                    {"role": "user", "content": full_prompt}
+                ],
+                max_tokens=1000,
+                temperature=0.7
+            )
+            
+            generated_code = response.choices[0].message.content.strip()
+            self.semantic_cache.add(cache_query, language, generated_code, prompt_embedding)
+            return {'status': 'success', 'code': generated_code, 'ai_used': True}
+            
+        except Exception as e:
+            logging.error(f"AI Code Generation Error: {e}")
+            # Fallback to template-based generation
+            return self.generate_fallback_code(prompt, language)
+    
+    def generate_fallback_code(self, prompt, language):
+        """Fallback code generation without AI"""
         # Simple keyword matching for fallback
         prompt_lower = prompt.lower()
         template_key = 'calculator' if any(word in prompt_lower for word in ['calculate', 'math', 'add', 'subtract']) else 'file_processor'
         
-        if language in templates and template_key in templates[language]:
-            return {
-                'status': 'success', 
-                'code': templates[language][template_key],
-                'ai_used': False,
-                'note': 'Fallback template used - add OpenAI API key for AI generation'
-            }
-        else:
+        code = _TEMPLATES.get((language, template_key))
+        if code is None:
             return {
                 'status': 'error',
                 'message': 'No template found for this request',
                 'ai_used': False
             }
+        return {
+            'status': 'success', 
+            'code': code,
+            'ai_used': False,
+            'note': 'Fallback template used - add OpenAI API key for AI generation'
+        }
     
     def code_review(self, code, language='python'):
         """Provide code review suggestions"""
@@ -143,9 +308,8 @@ async function fetchData(url) {
             lines = code.split('\n')
             
             # Check for long lines
-            for i, line in enumerate(lines, 1):
-                if len(line) > 80:
-                    suggestions.append(f"Line {i}: Consider breaking long line ({len(line)} characters)")
+            for i, length in long_lines(code, 80):
+                suggestions.append(f"Line {i}: Consider breaking long line ({length} characters)")
             
             # Check for basic Python patterns
             if language == 'python':
@@ -174,29 +338,26 @@ async function fetchData(url) {
     def generate_documentation(self, code, language='python'):
         """Generate basic documentation for code"""
         try:
-            doc_lines = []
             lines = code.split('\n')
+            buf = io.StringIO()
+            w = buf.write
             
-            doc_lines.append(f"# Code Documentation")
-            doc_lines.append(f"Language: {language}")
-            doc_lines.append(f"Total Lines: {len(lines)}")
-            doc_lines.append("")
+            w(f"# Code Documentation\nLanguage: {language}\nTotal Lines: {len(lines)}\n\n")
             
             # Extract function definitions
             for i, line in enumerate(lines):
                 if line.strip().startswith('def '):
                     func_name = line.split('def ')[1].split('(')[0]
-                    doc_lines.append(f"## Function: {func_name}")
-                    doc_lines.append(f"Line: {i+1}")
-                    doc_lines.append("")
+                    w(f"## Function: {func_name}\nLine: {i+1}\n\n")
                     # Look for docstring
                     if i + 1 < len(lines) and '"""' in lines[i+1]:
-                        doc_lines.append("Description: " + lines[i+1].replace('"""', '').strip())
-                    doc_lines.append("")
+                        w("Description: " + lines[i+1].replace('"""', '').strip() + "\n")
+                    w("\n")
             
             return {
                 'status': 'success',
-                'documentation': '\n'.join(doc_lines)
+                # Every entry is newline-terminated; drop the final one
+                'documentation': buf.getvalue()[:-1]
             }
             
         except Exception as e:
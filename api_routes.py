@@ -3,15 +3,55 @@ API Routes for Mobile Applications (Flutter)
 Returns JSON only, uses JWT authentication
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as PoolTimeoutError
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models import User, Order, Restaurant
-from werkzeug.security import check_password_hash
+from models import User, Order, OrderItem, Restaurant
+from werkzeug.security import check_password_hash, generate_password_hash
 from jwt_manager import jwt_auth
 from decorators import jwt_required
 
 api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
+# Password hashing (pbkdf2) is CPU-bound - run it in worker processes
+# so one slow login does not block the Flask worker thread
+PASSWORD_HASH_TIMEOUT = 5
+_password_pool = None
+
+@api_bp.record_once
+def _start_password_pool(state):
+    """Create and warm up the hashing pool when the blueprint is registered (app startup)"""
+    global _password_pool
+    workers = state.app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+    _password_pool = ProcessPoolExecutor(max_workers=workers)
+    # Fork the workers now instead of inside the first login request
+    _password_pool.submit(os.getpid).result()
+
+def _run_password_hash(fn, *args):
+    """Run fn on the hashing pool; raises PoolTimeoutError if the pool is saturated"""
+    future = _password_pool.submit(fn, *args)
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except PoolTimeoutError:
+        # Still queued: drop it so a backlog does not keep growing
+        future.cancel()
+        raise
+
+def _busy():
+    return jsonify({'error': 'Server busy, please retry'}), 503
+
+def _deny(user, order, restaurant):
+    return False
+
+# Who may view an order, keyed by user role
+_ORDER_VIEW_PERMISSIONS = {
+    'admin': lambda user, order, restaurant: True,
+    'customer': lambda user, order, restaurant: order.customer_id == user.id,
+    'driver': lambda user, order, restaurant: order.driver_id == user.id,
+    'restaurant': lambda user, order, restaurant: bool(restaurant) and order.restaurant_id == restaurant.id,
+}
+
 @api_bp.route('/auth/login', methods=['POST'])
 def api_login():
     """API login endpoint - returns JWT tokens"""
@@ -22,7 +62,14 @@ def api_login():
     
     user = User.query.filter_by(email=data['email']).first()
     
-    if user and check_password_hash(user.password_hash, data['password']):
+    try:
+        password_ok = user is not None and _run_password_hash(
+            check_password_hash, user.password_hash, data['password']
+        )
+    except PoolTimeoutError:
+        return _busy()
+
+    if password_ok:
         # Create JWT tokens
         tokens = jwt_auth.create_tokens(user.id)
         
@@ -54,11 +101,14 @@ def api_register():
         return jsonify({'error': 'Username already taken'}), 400
     
     # Create user
-    from werkzeug.security import generate_password_hash
+    try:
+        password_hash = _run_password_hash(generate_password_hash, data['password'])
+    except PoolTimeoutError:
+        return _busy()
     user = User(
         username=data['username'],
         email=data['email'],
-        password_hash=generate_password_hash(data['password']),
+        password_hash=password_hash,
         role=data.get('role', 'customer')
     )
     
@@ -117,27 +167,38 @@ def api_orders():
     user = User.query.get(user_id)
     
     # Determine which orders to show based on role
+    order_filter = None
     if user.role == 'customer':
-        orders = Order.query.filter_by(customer_id=user_id).all()
+        order_filter = Order.customer_id == user_id
     elif user.role == 'driver':
-        orders = Order.query.filter_by(driver_id=user_id).all()
+        order_filter = Order.driver_id == user_id
     elif user.role == 'restaurant':
         # Get restaurant owned by user, then its orders
         restaurant = Restaurant.query.filter_by(owner_id=user_id).first()
-        orders = Order.query.filter_by(restaurant_id=restaurant.id).all() if restaurant else []
-    else:
-        orders = []
+        if restaurant:
+            order_filter = Order.restaurant_id == restaurant.id
+    
+    # Fetch only the scalar columns we serialize (no ORM object hydration)
+    rows = []
+    if order_filter is not None:
+        rows = db.session.query(
+            Order.id, Order.status, Order.total_amount, Order.created_at
+        ).filter(order_filter).all()
+    
+    # Load items for all listed orders in one query instead of one per order
+    items_by_order = {row.id: [] for row in rows}
+    if items_by_order:
+        for item in OrderItem.query.filter(OrderItem.order_id.in_(items_by_order)).all():
+            items_by_order[item.order_id].append(item.to_dict())
     
     # Serialize orders to JSON
-    orders_data = []
-    for order in orders:
-        orders_data.append({
-            'id': order.id,
-            'status': order.status,
-            'total_amount': order.total_amount,
-            'created_at': order.created_at.isoformat() if order.created_at else None,
-            'items': [item.to_dict() for item in order.items]
-        })
+    orders_data = [{
+        'id': row.id,
+        'status': row.status,
+        'total_amount': row.total_amount,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'items': items_by_order[row.id]
+    } for row in rows]
     
     return jsonify({
         'status': 'success',
@@ -158,18 +219,9 @@ def api_order_detail(order_id):
     if not order:
         return jsonify({'error': 'Order not found'}), 404
     
-    # Check permission
-    can_view = False
-    if user.role == 'admin':
-        can_view = True
-    elif user.role == 'customer' and order.customer_id == user_id:
-        can_view = True
-    elif user.role == 'driver' and order.driver_id == user_id:
-        can_view = True
-    elif user.role == 'restaurant':
-        restaurant = Restaurant.query.filter_by(owner_id=user_id).first()
-        if restaurant and order.restaurant_id == restaurant.id:
-            can_view = True
+    # Check permission (restaurant lookup only needed for restaurant owners)
+    restaurant = Restaurant.query.filter_by(owner_id=user_id).first() if user.role == 'restaurant' else None
+    can_view = _ORDER_VIEW_PERMISSIONS.get(user.role, _deny)(user, order, restaurant)
     
     if not can_view:
         return jsonify({'error': 'Permission denied'}), 403
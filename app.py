@@ -1,7 +1,8 @@
 import os
 from flask import Flask, render_template
 from flask_cors import CORS
-from extensions import db, jwt  # Import extensions
+from sqlalchemy import inspect
+from extensions import db, jwt, ORJSONProvider  # Import extensions
 from models import User
 
 # Import Blueprints
@@ -12,8 +13,16 @@ except ImportError:
     print("Warning: api_routes not found yet")
     api_bp = None
 
+# Optional: gzip/brotli compression for large JSON responses
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 def create_app():
     app = Flask(__name__)
+    if ORJSONProvider:
+        app.json = ORJSONProvider(app)
     basedir = os.path.abspath(os.path.dirname(__file__))
     
     # Config
@@ -21,11 +30,26 @@ def create_app():
     app.config['SECRET_KEY'] = 'final-secret-key'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JWT_SECRET_KEY'] = 'jwt-secret-key-agent50'  # NEW: For Mobile Security
+    app.config['ENV'] = os.environ.get('FLASK_ENV', 'development')
+    # Connection pool tuning: reuse DB connections across requests
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+    # Response compression (order lists are large, highly compressible JSON)
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
 
     # Initialize Plugins
     db.init_app(app)
     jwt.init_app(app)  # Initialize JWT
     CORS(app)
+    if Compress:
+        Compress(app)
 
     # Register Blueprints
     if api_bp:
@@ -50,12 +74,20 @@ def create_app():
 
     return app
 
+def init_database(app):
+    """Create tables on first boot only (production uses Alembic migrations)"""
+    if app.config.get('ENV') == 'production':
+        return
+    # Skip the CREATE TABLE round-trips once the schema exists
+    if not inspect(db.engine).has_table(User.__tablename__):
+        db.create_all()
+
 # Entry Point
 app = create_app()
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_database(app)
         # Create Admin User if not exists
         if not User.query.filter_by(email='admin@example.com').first():
             print("⚡ Creating Test Users...")
@@ -3,59 +3,128 @@
 PAK-CHINA FRIENDSHIP LEVEL SECURITY API!
 """
 
-from flask import request, jsonify
-from auth_system import token_required, AuthSystem
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, jsonify, g
+from sqlalchemy.exc import IntegrityError
+from extensions import db, ORJSONProvider
+from auth_system import init_secret, verify_token, verify_password, hash_password, needs_rehash
 from crud_operations import UserCRUD
 
+# Argon2 hashing GIL chhod deta hai - pool mein concurrent logins/signups parallel chalte hain
+_PASSWORD_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Failed login throttle: per username sliding window
+MAX_FAILED_LOGINS = 5
+FAILED_LOGIN_WINDOW = 60  # seconds
+MAX_TRACKED_USERNAMES = 10000  # random usernames se dict bina hadd ke na barhe
+_failed_logins = OrderedDict()  # username -> attempts, sab se purani failure pehle
+_failed_logins_lock = threading.Lock()
+
+# Token verify karne wale endpoints aur verify_token ke error results
+_TOKEN_ENDPOINTS = frozenset(('get_current_user', 'protected_route'))
+_TOKEN_ERRORS = ("Token is missing", "Token Expired", "Invalid Token", "Auth Error")
+
+# Registration ke liye zaroori fields (module load par ek baar)
+_REQUIRED_FIELDS = ('username', 'email', 'password')
+_UNIQUE_FIELDS = ('username', 'email')
+
+def _duplicate_field(error):
+    """UNIQUE violation username/email par ho to woh field, warna None"""
+    message = str(error.orig).lower().partition('\n')[0]
+    if 'unique' not in message and 'duplicate' not in message:
+        return None
+    # Sirf constraint/key ka naam dekho - message mein user ki value bhi ho sakti hai
+    for marker in ('for key', 'constraint'):
+        if marker in message:
+            message = message.rsplit(marker, 1)[1]
+            break
+    for field in _UNIQUE_FIELDS:
+        if field in message:
+            return field
+    return None
+
+def _too_many_failures(username):
+    """Window ke andar MAX_FAILED_LOGINS se zyada failures? (password hash se pehle check)"""
+    cutoff = time.monotonic() - FAILED_LOGIN_WINDOW
+    with _failed_logins_lock:
+        attempts = _failed_logins.get(username)
+        if not attempts:
+            return False
+        while attempts and attempts[0] < cutoff:
+            attempts.popleft()
+        if not attempts:
+            del _failed_logins[username]
+            return False
+        return len(attempts) >= MAX_FAILED_LOGINS
+
+def _record_failure(username):
+    now = time.monotonic()
+    cutoff = now - FAILED_LOGIN_WINDOW
+    with _failed_logins_lock:
+        # Aage wali entries expire ho chuki hon to saaf karo; phir bhi full ho to sab se purani nikal do
+        while _failed_logins and next(iter(_failed_logins.values()))[-1] < cutoff:
+            _failed_logins.popitem(last=False)
+        if username not in _failed_logins and len(_failed_logins) >= MAX_TRACKED_USERNAMES:
+            _failed_logins.popitem(last=False)
+        _failed_logins.setdefault(username, deque()).append(now)
+        _failed_logins.move_to_end(username)
+
 def setup_auth_routes(app):
     """Authentication routes setup karta hai"""
     
-    auth = AuthSystem()
+    init_secret(app)
+    if ORJSONProvider and not isinstance(app.json, ORJSONProvider):
+        app.json = ORJSONProvider(app)
+    
+    @app.before_request
+    def attach_user_data():
+        """Protected endpoints ke liye token ek hi jagah verify karta hai (g.user_data)"""
+        if request.endpoint not in _TOKEN_ENDPOINTS:
+            return None
+        g.user_data = None
+        auth_header = request.headers.get('Authorization', '')
+        result = verify_token(auth_header[7:]) if auth_header.startswith('Bearer ') else "Token is missing"
+        if isinstance(result, str) and result.startswith(_TOKEN_ERRORS):
+            return jsonify({
+                "success": False,
+                "error": result
+            }), 401
+        g.user_data = {'user_id': result}
+        return None
     
     @app.route('/api/auth/register', methods=['POST'])
     def register_user():
         """New user register karta hai"""
         try:
-            data = request.json
+            data = request.get_json(cache=True, silent=True) or {}
             
             # Required fields check
-            required_fields = ['username', 'email', 'password']
-            for field in required_fields:
-                if field not in data or not data[field]:
+            for field in _REQUIRED_FIELDS:
+                if not data.get(field):
                     return jsonify({
                         "success": False,
                         "error": f"{field} is required"
                     }), 400
+            username = data['username']
+            email = data['email']
             
-            # Check if user already exists
-            user_crud = UserCRUD()
-            existing_user = user_crud.filter_by(username=data['username'])
-            if existing_user:
+            # Create new user (password hash create_user ke andar, ek hi commit)
+            # Duplicate username/email: DB ke UNIQUE index INSERT mein hi pakar lete hain
+            try:
+                user = UserCRUD.create_user(username, email, data['password'])
+            except IntegrityError as e:
+                duplicate = _duplicate_field(e)
+                if duplicate is None:
+                    raise
                 return jsonify({
                     "success": False,
-                    "error": "Username already exists"
+                    "error": f"{duplicate.capitalize()} already exists"
                 }), 400
             
-            existing_email = user_crud.filter_by(email=data['email'])
-            if existing_email:
-                return jsonify({
-                    "success": False,
-                    "error": "Email already exists"
-                }), 400
-            
-            # Create new user
-            user_data = {
-                'username': data['username'],
-                'email': data['email'],
-                'full_name': data.get('full_name', ''),
-                'is_admin': data.get('is_admin', False)
-            }
-            
-            user = user_crud.create(user_data)
-            
-            # Set password
-            user.set_password(data['password'])
-            
             # Generate token
             token = user.generate_auth_token()
             
@@ -80,20 +149,30 @@ def setup_auth_routes(app):
     def login_user():
         """User login karta hai"""
         try:
-            data = request.json
+            data = request.get_json(cache=True, silent=True) or {}
+            username = data.get('username')
+            password = data.get('password')
             
             # Required fields check
-            if 'username' not in data or 'password' not in data:
+            if not (username and password):
                 return jsonify({
                     "success": False,
                     "error": "Username and password required"
                 }), 400
             
+            # Credential stuffing: password hash chalane se pehle hi reject
+            if _too_many_failures(username):
+                return jsonify({
+                    "success": False,
+                    "error": "Too many failed login attempts, try again later"
+                }), 401
+            
             # Find user
             user_crud = UserCRUD()
-            users = user_crud.filter_by(username=data['username'])
+            users = user_crud.filter_by(username=username)
             
             if not users:
+                _record_failure(username)
                 return jsonify({
                     "success": False,
                     "error": "Invalid username or password"
@@ -101,13 +180,19 @@ def setup_auth_routes(app):
             
             user = users[0]
             
-            # Check password
-            if not user.check_password(data['password']):
+            # Check password (hash worker thread par) - Argon2 aur purane bcrypt dono
+            if not _PASSWORD_POOL.submit(verify_password, user.password_hash, password).result():
+                _record_failure(username)
                 return jsonify({
                     "success": False,
                     "error": "Invalid username or password"
                 }), 401
             
+            # Purana bcrypt (ya badle hue Argon2 parameters): sahi password ab pata hai, naya hash save karo
+            if needs_rehash(user.password_hash):
+                user.password_hash = _PASSWORD_POOL.submit(hash_password, password).result()
+                db.session.commit()
+            
             # Generate token
             token = user.generate_auth_token()
             
@@ -130,12 +215,11 @@ def setup_auth_routes(app):
             }), 500
     
     @app.route('/api/auth/me')
-    @token_required
     def get_current_user():
         """Current logged in user get karta hai"""
         try:
             user_crud = UserCRUD()
-            user = user_crud.get_by_id(request.user_data['user_id'])
+            user = user_crud.get_summary(g.user_data['user_id'])
             
             if not user:
                 return jsonify({
@@ -161,18 +245,19 @@ def setup_auth_routes(app):
             }), 500
     
     @app.route('/api/auth/protected')
-    @token_required
     def protected_route():
         """Protected route example"""
         return jsonify({
             "success": True,
             "message": "🔐 This is a protected route!",
-            "user": request.user_data
+            "user": g.user_data
         })
     
-    print("✅ KING DEEPSEEK AUTH ROUTES LOADED!")
-    print("🔐 Available endpoints:")
-    print("   POST /api/auth/register - User registration")
-    print("   POST /api/auth/login - User login")
-    print("   GET  /api/auth/me - Get current user")
-    print("   GET  /api/auth/protected - Protected route")
\ No newline at end of file
+    print("\n".join((
+        "✅ KING DEEPSEEK AUTH ROUTES LOADED!",
+        "🔐 Available endpoints:",
+        "   POST /api/auth/register - User registration",
+        "   POST /api/auth/login - User login",
+        "   GET  /api/auth/me - Get current user",
+        "   GET  /api/auth/protected - Protected route"
+    )))
\ No newline at end of file
@@ -1,12 +1,57 @@
 import jwt
+import hmac
+import json
+import time
+import base64
+import hashlib
 import datetime
+import threading
+from collections import OrderedDict
 from flask import current_app
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from extensions import bcrypt
 
 # --- CONFIGURATION ---
 # Agar config file mein key na mile to yeh fallback use karega (Development ke liye)
 DEFAULT_SECRET_KEY = "agent50_supreme_secret_key_change_in_prod"
 TOKEN_EXPIRATION_HOURS = 24  # Token 24 ghante baad expire hoga
+_EXP_DELTA = datetime.timedelta(hours=TOKEN_EXPIRATION_HOURS)
+
+# Decoded token cache: har request par jwt.decode (HMAC + JSON) se bachne ke liye
+TOKEN_CACHE_TTL = 5  # seconds
+TOKEN_CACHE_MAX_SIZE = 10000
+_TOKEN_CACHE = OrderedDict()  # token -> (result, cache_expires_at, token_exp)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+# JWT signing: header hamesha same hai, is liye base64 ek hi baar
+_JWT_HEADER_B64 = b'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9'  # {"alg":"HS256","typ":"JWT"}
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+def _config_secret_bytes(config):
+    """
+    SECRET_KEY ke bytes; configured string ke against cache hote hain,
+    is liye key set/rotate ho to agli call naya key utha leti hai.
+    SECRET_KEY None (Flask default) ho to DEFAULT_SECRET_KEY.
+    """
+    secret = config.get('SECRET_KEY') or DEFAULT_SECRET_KEY
+    cached = config.get('_SECRET_BYTES')
+    if cached is None or cached[0] != secret:
+        cached = (secret, secret.encode())
+        config['_SECRET_BYTES'] = cached
+    return cached[1]
+
+def init_secret(app):
+    """SECRET_KEY bytes app init par pehle se bana deta hai"""
+    _config_secret_bytes(app.config)
+
+def _secret_bytes():
+    return _config_secret_bytes(current_app.config)
+
+# Argon2id hasher - bcrypt se kam CPU per login, memory-hard security
+_PASSWORD_HASHER = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
 
 def hash_password(password):
     """
@@ -14,16 +59,28 @@ def hash_password(password):
     Input: Plain password (e.g., 'password123')
     Output: Encrypted Hash string
     """
-    # Generate hash and decode to utf-8 string for storage
-    return bcrypt.generate_password_hash(password).decode('utf-8')
+    return _PASSWORD_HASHER.hash(password)
 
 def verify_password(password_hash, password):
     """
     Check karta hai ke user ka password sahi hai ya nahi.
     Input: Database ka hash, User ka diya hua password
     Output: True / False
+    Purane bcrypt hashes ($2...) bhi verify hote hain (dekhein needs_rehash).
     """
-    return bcrypt.check_password_hash(password_hash, password)
+    if password_hash.startswith('$2'):
+        return bcrypt.check_password_hash(password_hash, password)
+    try:
+        return _PASSWORD_HASHER.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def needs_rehash(password_hash):
+    """
+    True agar hash purana bcrypt hai ya Argon2 parameters badal gaye hain.
+    Successful login ke baad caller hash_password se naya hash save kare.
+    """
+    return password_hash.startswith('$2') or _PASSWORD_HASHER.check_needs_rehash(password_hash)
 
 def generate_token(user_id):
     """
@@ -31,33 +88,51 @@ def generate_token(user_id):
     Includes: User ID, Issued Time (iat), Expiration Time (exp)
     """
     try:
+        now = datetime.datetime.now(datetime.timezone.utc)
         payload = {
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=TOKEN_EXPIRATION_HOURS),
-            'iat': datetime.datetime.utcnow(),
+            'exp': int((now + _EXP_DELTA).timestamp()),
+            'iat': int(now.timestamp()),
             'sub': user_id
         }
         
-        # Secret Key App Config se uthayega
-        secret_key = current_app.config.get('SECRET_KEY', DEFAULT_SECRET_KEY)
+        # Secret Key App Config se (pehle se bytes mein)
+        secret_key = _secret_bytes()
         
-        # Token Encode karein
-        token = jwt.encode(
-            payload,
-            secret_key,
-            algorithm='HS256'
-        )
-        return token
+        # Token Encode karein: header.payload.signature (HS256)
+        signing_input = _JWT_HEADER_B64 + b'.' + _b64url(json.dumps(payload, separators=(',', ':')).encode())
+        signature = hmac.new(secret_key, signing_input, hashlib.sha256).digest()
+        return (signing_input + b'.' + _b64url(signature)).decode('ascii')
     except Exception as e:
         print(f"[AUTH ERROR] Token generation failed: {str(e)}")
         return None
 
+def _cache_token_result(token, result, token_exp=None):
+    """Verify result ko TTL ke saath cache karta hai (LRU eviction)"""
+    expires_at = time.monotonic() + TOKEN_CACHE_TTL
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE[token] = (result, expires_at, token_exp)
+        _TOKEN_CACHE.move_to_end(token)
+        if len(_TOKEN_CACHE) > TOKEN_CACHE_MAX_SIZE:
+            _TOKEN_CACHE.popitem(last=False)
+    return result
+
 def verify_token(token):
     """
     Aane wale token ko verify karta hai.
     Returns: User ID (agar valid hai) ya Error Message
+    Results (valid aur invalid dono) 5 second ke liye cache hote hain.
     """
+    with _TOKEN_CACHE_LOCK:
+        cached = _TOKEN_CACHE.get(token)
+        if cached:
+            _TOKEN_CACHE.move_to_end(token)
+    if cached:
+        result, expires_at, token_exp = cached
+        if expires_at > time.monotonic() and (token_exp is None or token_exp > time.time()):
+            return result
+
     try:
-        secret_key = current_app.config.get('SECRET_KEY', DEFAULT_SECRET_KEY)
+        secret_key = _secret_bytes()
         
         # Token Decode karein
         payload = jwt.decode(
@@ -65,11 +140,11 @@ def verify_token(token):
             secret_key,
             algorithms=['HS256']
         )
-        return payload['sub'] # Valid User ID return karega
+        return _cache_token_result(token, payload['sub'], payload.get('exp')) # Valid User ID return karega
 
     except jwt.ExpiredSignatureError:
-        return "Token Expired" # Token purana ho gaya
+        return _cache_token_result(token, "Token Expired") # Token purana ho gaya
     except jwt.InvalidTokenError:
-        return "Invalid Token" # Token ghalat ya fake hai
+        return _cache_token_result(token, "Invalid Token") # Token ghalat ya fake hai
     except Exception as e:
         return f"Auth Error: {str(e)}"
\ No newline at end of file
@@ -4,9 +4,51 @@ import requests
 import json
 import time
 from pathlib import Path
+import shlex
 import subprocess
 import sys
 
+# Platform-wise deployment steps (project par depend nahi karte, is liye constant;
+# callers ko har baar naya copy milta hai, constant kabhi mutate nahi hota)
+_DEPLOYMENT_STEPS = (
+    {
+        "platform": "Render",
+        "steps": (
+            "1. Go to https://render.com",
+            "2. Click 'New +' → 'Web Service'",
+            "3. Connect your GitHub repository",
+            "4. Set build command: pip install -r requirements.txt",
+            "5. Set start command: python app.py",
+            "6. Click 'Create Web Service'",
+            "7. Your app will be live at: https://your-app.onrender.com"
+        )
+    },
+    {
+        "platform": "Vercel",
+        "steps": (
+            "1. Go to https://vercel.com",
+            "2. Click 'Import Project'",
+            "3. Import from Git repository",
+            "4. Set framework to 'Other'",
+            "5. Set build command: pip install -r requirements.txt",
+            "6. Set output directory: .",
+            "7. Click 'Deploy'",
+            "8. Your app will be live immediately"
+        )
+    },
+    {
+        "platform": "Railway",
+        "steps": (
+            "1. Go to https://railway.app",
+            "2. Click 'New Project'",
+            "3. Connect your GitHub repository",
+            "4. Railway will auto-detect Python",
+            "5. It will automatically deploy",
+            "6. Your app will be live in 2-5 minutes"
+        )
+    }
+)
+
 class AutoDeploy:
     def __init__(self):
         self.base_dir = Path(__file__).parent
@@ -62,52 +104,62 @@ class AutoDeploy:
         """
         created_files = []
         
+        # Existing files ek hi directory scan se (har file ke liye alag stat nahi)
+        with os.scandir(project_dir) as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
+        
         # Check for requirements.txt
-        requirements_file = project_dir / "requirements.txt"
-        if not requirements_file.exists():
+        if "requirements.txt" not in existing:
             # Create basic requirements.txt
-            with open(requirements_file, 'w') as f:
-                f.write("flask\npython-dotenv\n")
+            (project_dir / "requirements.txt").write_text("flask\npython-dotenv\n")
             created_files.append("requirements.txt")
         
-        # Create runtime.txt for Python version
-        runtime_file = project_dir / "runtime.txt"
-        with open(runtime_file, 'w') as f:
-            f.write("python-3.9.18\n")
-        created_files.append("runtime.txt")
-        
-        # Create Procfile for web process
-        procfile = project_dir / "Procfile"
-        with open(procfile, 'w') as f:
-            f.write("web: python app.py\n")
-        created_files.append("Procfile")
-        
-        # Create .gitignore
-        gitignore = project_dir / ".gitignore"
-        with open(gitignore, 'w') as f:
-            f.write("__pycache__/\n*.pyc\n.env\n.DS_Store\n")
-        created_files.append(".gitignore")
+        deployment_files = [
+            ("runtime.txt", "python-3.9.18\n"),                          # Python version
+            ("Procfile", "web: python app.py\n"),                        # Web process
+            (".gitignore", "__pycache__/\n*.pyc\n.env\n.DS_Store\n"),
+        ]
+        for filename, content in deployment_files:
+            if self._write_if_changed(project_dir / filename, content, filename in existing):
+                created_files.append(filename)
         
         return created_files
     
+    @staticmethod
+    def _write_if_changed(path: Path, content: str, exists: bool) -> bool:
+        """
+        File sirf tab likhta hai jab content alag ho; likhi gayi to True
+        """
+        if exists and path.read_text() == content:
+            return False
+        path.write_text(content)
+        return True
+    
     def init_git_repo(self, project_dir: Path, project_name: str) -> dict:
         """
         Git repository initialize karta hai
         """
         try:
-            # Initialize git
-            subprocess.run(["git", "init"], cwd=project_dir, capture_output=True, text=True)
-            
-            # Add all files
-            subprocess.run(["git", "add", "."], cwd=project_dir, capture_output=True, text=True)
-            
-            # Initial commit
-            commit_result = subprocess.run(
-                ["git", "commit", "-m", f"Initial commit: {project_name}"],
-                cwd=project_dir,
-                capture_output=True, 
-                text=True
+            message = f"Initial commit: {project_name}"
+            commands = (
+                ["git", "init"],
+                ["git", "add", "."],
+                ["git", "commit", "-m", message]
             )
+            if os.name == "nt":
+                # cmd.exe backslash escapes nahi samajhta - Windows par alag argv calls (koi shell nahi)
+                for argv in commands:
+                    commit_result = subprocess.run(argv, cwd=project_dir, capture_output=True, text=True)
+                    if commit_result.returncode != 0:
+                        break
+            else:
+                # POSIX: init + add + commit ek hi sh process mein, har arg shlex.quote se
+                commit_result = subprocess.run(
+                    ["sh", "-c", " && ".join(shlex.join(argv) for argv in commands)],
+                    cwd=project_dir,
+                    capture_output=True, 
+                    text=True
+                )
             
             return {
                 "success": commit_result.returncode == 0,
@@ -122,48 +174,12 @@ class AutoDeploy:
         """
         Deployment steps provide karta hai
         """
-        return [
-            {
-                "platform": "Render",
-                "steps": [
-                    "1. Go to https://render.com",
-                    "2. Click 'New +' → 'Web Service'",
-                    "3. Connect your GitHub repository",
-                    f"4. Set build command: pip install -r requirements.txt",
-                    "5. Set start command: python app.py",
-                    "6. Click 'Create Web Service'",
-                    "7. Your app will be live at: https://your-app.onrender.com"
-                ]
-            },
-            {
-                "platform": "Vercel",
-                "steps": [
-                    "1. Go to https://vercel.com",
-                    "2. Click 'Import Project'",
-                    "3. Import from Git repository",
-                    "4. Set framework to 'Other'",
-                    "5. Set build command: pip install -r requirements.txt",
-                    "6. Set output directory: .",
-                    "7. Click 'Deploy'",
-                    "8. Your app will be live immediately"
-                ]
-            },
-            {
-                "platform": "Railway",
-                "steps": [
-                    "1. Go to https://railway.app",
-                    "2. Click 'New Project'",
-                    "3. Connect your GitHub repository",
-                    "4. Railway will auto-detect Python",
-                    "5. It will automatically deploy",
-                    "6. Your app will be live in 2-5 minutes"
-                ]
-            }
-        ]
+        return [dict(entry, steps=list(entry["steps"])) for entry in _DEPLOYMENT_STEPS]
     
-    def simulate_deployment(self, project_name: str, platform: str = "render") -> dict:
+    def simulate_deployment(self, project_name: str, platform: str = "render", delay: float = 0.0) -> dict:
         """
         Deployment process simulate karta hai (real API calls ke bina)
+        delay: har step ke baad pause (CLI demo ke liye), default koi wait nahi
         """
         print(f"🚀 Simulating deployment to {platform}...")
         
@@ -180,7 +196,8 @@ class AutoDeploy:
         
         for step in steps:
             print(f"   {step}")
-            time.sleep(1)
+            if delay:
+                time.sleep(delay)
         
         # Generate fake URL
         fake_url = f"https://{project_name}-{platform}.example.com"
@@ -198,7 +215,7 @@ class AutoDeploy:
             ]
         }
     
-    def generate_deployment_guide(self, project_name: str) -> dict:
+    def generate_deployment_guide(self, project_name: str, delay: float = 0.0) -> dict:
         """
         Complete deployment guide generate karta hai
         """
@@ -212,15 +229,14 @@ class AutoDeploy:
             "project": project_name,
             "preparation": preparation,
             "deployment_options": self.platforms,
-            "deployment_steps": self.get_deployment_steps(project_name),
-            "quick_deploy": self.simulate_deployment(project_name)
+            "deployment_steps": preparation["next_steps"],
+            "quick_deploy": self.simulate_deployment(project_name, delay=delay)
         }
 
 def main():
     deploy = AutoDeploy()
     
-    print("=== ☁️ AI DEV AGENT - AUTO DEPLOYMENT ===")
-    print("ONE-CLICK CLOUD DEPLOYMENT SYSTEM!\n")
+    print("=== ☁️ AI DEV AGENT - AUTO DEPLOYMENT ===\nONE-CLICK CLOUD DEPLOYMENT SYSTEM!\n")
     
     project_name = input("Project ka naam likhen (e.g. agent50): ").strip()
     if not project_name:
@@ -229,27 +245,29 @@ def main():
     
     print(f"\n🎯 Generating deployment guide for: {project_name}")
     
-    guide = deploy.generate_deployment_guide(project_name)
+    guide = deploy.generate_deployment_guide(project_name, delay=1)
     
     if guide["success"]:
-        print(f"\n✅ DEPLOYMENT GUIDE READY!")
-        print(f"Project: {guide['project']}")
-        print(f"Files prepared: {len(guide['preparation']['deployment_files'])}")
-        print(f"Git initialized: {guide['preparation']['git_initialized']}")
-        
-        print(f"\n🌐 Available Platforms:")
-        for platform_id, platform_info in guide['deployment_options'].items():
-            print(f"  - {platform_info['name']} ({platform_info['url']})")
-        
-        print(f"\n🚀 Quick Deploy Simulation:")
         quick_deploy = guide['quick_deploy']
-        print(f"  Platform: {quick_deploy['platform']}")
-        print(f"  URL: {quick_deploy['url']}")
-        print(f"  Status: {quick_deploy['status']}")
-        
-        print(f"\n📋 Manual Deployment Steps (Render):")
-        for step in guide['deployment_steps'][0]['steps']:
-            print(f"  {step}")
+        # Poori report ek hi write mein
+        report = [
+            "\n✅ DEPLOYMENT GUIDE READY!",
+            f"Project: {guide['project']}",
+            f"Files prepared: {len(guide['preparation']['deployment_files'])}",
+            f"Git initialized: {guide['preparation']['git_initialized']}",
+            "\n🌐 Available Platforms:"
+        ]
+        report.extend(f"  - {platform_info['name']} ({platform_info['url']})"
+                      for platform_info in guide['deployment_options'].values())
+        report.extend([
+            "\n🚀 Quick Deploy Simulation:",
+            f"  Platform: {quick_deploy['platform']}",
+            f"  URL: {quick_deploy['url']}",
+            f"  Status: {quick_deploy['status']}",
+            "\n📋 Manual Deployment Steps (Render):"
+        ])
+        report.extend(f"  {step}" for step in guide['deployment_steps'][0]['steps'])
+        print("\n".join(report))
             
     else:
         print(f"❌ Error: {guide['error']}")
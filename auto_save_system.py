@@ -4,15 +4,48 @@ AGENT 50 - AUTO SAVE SYSTEM
 """
 
 from pathlib import Path
+import os
 import json
+import time
+import atexit
+import threading
 from datetime import datetime
 
+# orjson (C ایکسٹینشن) دستیاب ہو تو اسی سے؛ دونوں صورتوں میں bytes واپس
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
 ROOT = Path(__file__).resolve().parent
 PROJECTS_DIR = ROOT / "projects"
+LOG_FILE = ROOT / "file_operations.log"
+
+# لاگ بفر: اندراجات جمع کر کے ایک ہی write میں فائل میں لکھیں
+LOG_FLUSH_BYTES = 64 * 1024  # بفر اس سائز تک پہنچے تو فوراً لکھیں
+LOG_FLUSH_INTERVAL = 5.0     # یا پچھلی بار لکھنے کے اتنے سیکنڈ بعد
+_LOG_BUF = []
+_LOG_LOCK = threading.Lock()
+_log_buf_size = 0
+_log_last_flush = time.monotonic()
+_log_timer = None  # daemon ٹائمر: بیکار سرور پر بھی بفر LOG_FLUSH_INTERVAL کے اندر لکھا جائے
+
+# پروجیکٹ نام -> فولڈر Path، ہر نام کے لیے Path ایک ہی بار بنے
+_PROJECT_ROOT_CACHE = {}
+
+def _project_root(project_name: str):
+    """پروجیکٹ فولڈر کا Path (کیش سے) - فولڈر بناتا نہیں"""
+    root = _PROJECT_ROOT_CACHE.get(project_name)
+    if root is None:
+        root = _PROJECT_ROOT_CACHE.setdefault(project_name, PROJECTS_DIR / project_name)
+    return root
 
 def ensure_project_folder(project_name: str):
     """پروجیکٹ فولڈر بنائیں اگر موجود نہ ہو"""
-    folder = PROJECTS_DIR / project_name
+    folder = _project_root(project_name)
+    # exist_ok=True خود "اگر موجود نہ ہو" سنبھالتا ہے - الگ exists() چیک کی ضرورت نہیں
     folder.mkdir(parents=True, exist_ok=True)
     return folder
 
@@ -32,92 +65,197 @@ def save_file(project_name: str, relative_path: str, content: str, encoding="utf
     
     return str(file_path)
 
+def _walk(folder):
+    """
+    فولڈر کی تمام فائلیں (relative_path, DirEntry) دیں - os.scandir سے، تاکہ
+    is_file() dirent سے ہی جواب دے اور stat() ہر فائل پر ایک ہی بار ہو
+    """
+    stack = [(str(folder), '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative_path = os.path.join(prefix, entry.name) if prefix else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, relative_path))
+                elif entry.is_file():
+                    yield relative_path, entry
+
+def _file_info(relative_path, entry):
+    st = entry.stat()
+    return {
+        'path': relative_path,
+        'size': st.st_size,
+        'modified': datetime.fromtimestamp(st.st_mtime).isoformat()
+    }
+
+def iter_project_files(project_name: str):
+    """پروجیکٹ کی فائلیں ایک ایک کر کے دیں (پوری فہرست میموری میں نہیں)"""
+    folder = _project_root(project_name)
+    if not folder.is_dir():
+        return
+    
+    for relative_path, entry in _walk(folder):
+        yield _file_info(relative_path, entry)
+
 def list_project_files(project_name: str):
     """پروجیکٹ کی تمام فائلوں کی فہرست دیں"""
-    folder = PROJECTS_DIR / project_name
-    if not folder.exists():
-        return []
-    
-    files = []
-    for file_path in folder.rglob("*"):
-        if file_path.is_file():
-            relative_path = str(file_path.relative_to(folder))
-            file_info = {
-                'path': relative_path,
-                'size': file_path.stat().st_size,
-                'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
-            }
-            files.append(file_info)
-    
-    return files
+    return list(iter_project_files(project_name))
 
 def read_file(project_name: str, relative_path: str, encoding="utf-8"):
     """فائل پڑھیں"""
-    folder = PROJECTS_DIR / project_name
+    folder = _project_root(project_name)
     file_path = folder / relative_path
     
-    if not file_path.exists():
+    # پہلے exists() اور پھر پڑھنے کے بجائے سیدھا پڑھیں (ایک syscall کم، race بھی نہیں)
+    try:
+        return file_path.read_text(encoding=encoding)
+    except FileNotFoundError:
         return None
-    
-    return file_path.read_text(encoding=encoding)
 
 def delete_file(project_name: str, relative_path: str):
     """فائل ڈیلیٹ کریں"""
-    folder = PROJECTS_DIR / project_name
+    folder = _project_root(project_name)
     file_path = folder / relative_path
     
-    if file_path.exists():
+    try:
         file_path.unlink()
         return True
-    return False
+    except FileNotFoundError:
+        return False
 
-def get_project_stats(project_name: str):
-    """پروجیکٹ کے اعداد و شمار دیں"""
-    files = list_project_files(project_name)
-    total_size = sum(f['size'] for f in files)
+def get_project_stats(project_name: str, include_files: bool = True):
+    """
+    پروجیکٹ کے اعداد و شمار دیں
+    include_files=False ہو تو صرف گنتی اور سائز - ہر فائل کی dict نہیں بنتی
+    """
+    folder = _project_root(project_name)
+    files = []
+    total_files = 0
+    total_size = 0
+    if folder.is_dir():
+        # ایک ہی walk میں گنتی، کل سائز اور (اگر مانگی ہو) فہرست
+        for relative_path, entry in _walk(folder):
+            total_files += 1
+            if include_files:
+                file_info = _file_info(relative_path, entry)
+                total_size += file_info['size']
+                files.append(file_info)
+            else:
+                total_size += entry.stat().st_size
     
-    return {
+    stats = {
         'project_name': project_name,
-        'total_files': len(files),
-        'total_size_bytes': total_size,
-        'files': files
+        'total_files': total_files,
+        'total_size_bytes': total_size
     }
+    if include_files:
+        stats['files'] = files
+    return stats
 
 def log_save_operation(project_name: str, file_path: str, content_length: int):
-    """فائل سیو آپریشن لاگ کریں"""
-    log_file = ROOT / "file_operations.log"
+    """فائل سیو آپریشن لاگ کریں (بفر میں، فائل میں بیچ کی صورت میں)"""
+    global _log_buf_size
     
-    log_entry = {
-        'timestamp': datetime.now().isoformat(),
+    # ٹائم سٹیمپ صرف نینو سیکنڈ میں؛ ISO سٹرنگ فلش کے وقت بنتی ہے
+    log_entry = _dumps({
         'project': project_name,
         'file': file_path,
         'size': content_length,
         'operation': 'save'
-    }
+    })
     
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    with _LOG_LOCK:
+        _LOG_BUF.append((time.time_ns(), log_entry))
+        _log_buf_size += len(log_entry) + 44  # + timestamp field
+        if _log_buf_size >= LOG_FLUSH_BYTES or time.monotonic() - _log_last_flush >= LOG_FLUSH_INTERVAL:
+            _flush_log_locked()
+        elif _log_timer is None:
+            _start_log_timer_locked()
 
-def create_project_structure(project_name: str, structure: dict):
-    """خود بخود پروجیکٹ ڈھانچہ بنائیں"""
+def _start_log_timer_locked():
+    """اگلا اندراج نہ بھی آئے تو LOG_FLUSH_INTERVAL بعد بفر لکھیں (_LOG_LOCK پکڑ کر)"""
+    global _log_timer
+    _log_timer = threading.Timer(LOG_FLUSH_INTERVAL, _flush_log_on_timer)
+    _log_timer.daemon = True
+    _log_timer.start()
+
+def _flush_log_on_timer():
+    global _log_timer
+    with _LOG_LOCK:
+        _log_timer = None
+        _flush_log_locked()
+
+def _flush_log_locked():
+    """بفر شدہ اندراجات ایک open اور ایک write میں لکھیں (_LOG_LOCK پکڑ کر)"""
+    global _log_buf_size, _log_last_flush
+    _log_last_flush = time.monotonic()
+    if not _LOG_BUF:
+        return
+    
+    # ایک ہی سیکنڈ کے اندراجات ISO تاریخ/وقت کا حصہ شیئر کرتے ہیں
+    lines = []
+    last_second = None
+    for timestamp_ns, log_entry in _LOG_BUF:
+        second, nanos = divmod(timestamp_ns, 1_000_000_000)
+        if second != last_second:
+            last_second = second
+            second_iso = datetime.fromtimestamp(second).isoformat().encode('ascii')
+        lines.append(b'{"timestamp":"%s.%06d",%s\n' % (second_iso, nanos // 1000, log_entry[1:]))
+    data = b''.join(lines)
+    _LOG_BUF.clear()
+    _log_buf_size = 0
+    fd = os.open(LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+def flush_log():
+    """باقی بفر فوراً فائل میں لکھیں"""
+    with _LOG_LOCK:
+        _flush_log_locked()
+
+# پروسیس بند ہونے پر کوئی اندراج ضائع نہ ہو
+atexit.register(flush_log)
+
+def save_files_batch(project_name: str, files: dict, encoding="utf-8"):
+    """کئی فائلیں ایک ساتھ سیو کریں - ہر ڈائریکٹری صرف ایک بار بنے"""
+    root = ensure_project_folder(project_name)
+    paths = {relative_path: root / relative_path for relative_path in files}
+    
+    # منفرد ڈائریکٹریاں، اوپر والی پہلے (static/css اور templates ایک ہی بار)
+    for directory in sorted({path.parent for path in paths.values()}, key=lambda p: len(p.parts)):
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass  # اس ڈائریکٹری کی فائلیں نیچے error رپورٹ کریں گی
+    
     results = []
-    for file_path, content in structure.items():
+    for relative_path, content in files.items():
         try:
-            result = save_file(project_name, file_path, content)
+            paths[relative_path].write_text(content, encoding=encoding)
+            log_save_operation(project_name, relative_path, len(content))
             results.append({
-                'file': file_path,
+                'file': relative_path,
                 'status': 'created',
-                'path': result
+                'path': str(paths[relative_path])
             })
         except Exception as e:
             results.append({
-                'file': file_path,
+                'file': relative_path,
                 'status': 'error',
                 'error': str(e)
             })
     
+    # پورے بیچ کا لاگ ایک ساتھ لکھیں
+    flush_log()
     return results
 
+def create_project_structure(project_name: str, structure: dict):
+    """خود بخود پروجیکٹ ڈھانچہ بنائیں"""
+    return save_files_batch(project_name, structure)
+
 # Example project structures
 WEB_APP_STRUCTURE = {
     "app.py": "# Main Flask Application\nfrom flask import Flask\n\napp = Flask(__name__)\n\n@app.route('/')\ndef home():\n    return 'Hello from Agent50!'\n\nif __name__ == '__main__':\n    app.run(debug=True)",
@@ -1,39 +1,75 @@
 # aws_deploy.py
-import boto3
 import os
 import time
-from botocore.exceptions import ClientError
+
+STACK_NAME = 'king-deepseek'
+
+# Poori network topology ek CloudFormation template mein (VPC, IGW, routes)
+_VPC_TEMPLATE = """{
+  "AWSTemplateFormatVersion": "2010-09-09",
+  "Resources": {
+    "VPC": {
+      "Type": "AWS::EC2::VPC",
+      "Properties": {
+        "CidrBlock": "10.0.0.0/16",
+        "Tags": [{"Key": "Name", "Value": "king-deepseek-vpc"}]
+      }
+    },
+    "InternetGateway": {"Type": "AWS::EC2::InternetGateway"},
+    "GatewayAttachment": {
+      "Type": "AWS::EC2::VPCGatewayAttachment",
+      "Properties": {
+        "VpcId": {"Ref": "VPC"},
+        "InternetGatewayId": {"Ref": "InternetGateway"}
+      }
+    },
+    "RouteTable": {
+      "Type": "AWS::EC2::RouteTable",
+      "Properties": {"VpcId": {"Ref": "VPC"}}
+    },
+    "DefaultRoute": {
+      "Type": "AWS::EC2::Route",
+      "DependsOn": "GatewayAttachment",
+      "Properties": {
+        "RouteTableId": {"Ref": "RouteTable"},
+        "DestinationCidrBlock": "0.0.0.0/0",
+        "GatewayId": {"Ref": "InternetGateway"}
+      }
+    }
+  },
+  "Outputs": {
+    "VpcId": {"Value": {"Ref": "VPC"}},
+    "InternetGatewayId": {"Value": {"Ref": "InternetGateway"}}
+  }
+}"""
 
 class AWSDeployer:
     def __init__(self):
+        # boto3 is heavy; only load it when an AWS deploy actually runs
+        import boto3
         self.ec2 = boto3.resource('ec2')
         self.ecs = boto3.client('ecs')
         self.elbv2 = boto3.client('elbv2')
+        self.cfn = boto3.client('cloudformation')
         
     def create_infrastructure(self):
         print("🚀 Creating AWS Infrastructure...")
         
-        # Create VPC
-        vpc = self.ec2.create_vpc(CidrBlock='10.0.0.0/16')
-        vpc.create_tags(Tags=[{"Key": "Name", "Value": "king-deepseek-vpc"}])
-        vpc.wait_until_available()
-        
-        print(f"✅ VPC Created: {vpc.id}")
+        # Ek stack call + ek waiter (har resource ke liye alag round-trip nahi)
+        self.cfn.create_stack(StackName=STACK_NAME, TemplateBody=_VPC_TEMPLATE)
+        self.cfn.get_waiter('stack_create_complete').wait(StackName=STACK_NAME)
         
-        # Create Internet Gateway
-        ig = self.ec2.create_internet_gateway()
-        vpc.attach_internet_gateway(InternetGatewayId=ig.id)
+        stack = self.cfn.describe_stacks(StackName=STACK_NAME)['Stacks'][0]
+        outputs = {o['OutputKey']: o['OutputValue'] for o in stack['Outputs']}
+        vpc_id = outputs['VpcId']
+        ig_id = outputs['InternetGatewayId']
         
-        # Create Route Table
-        route_table = vpc.create_route_table()
-        route_table.create_route(
-            DestinationCidrBlock='0.0.0.0/0',
-            GatewayId=ig.id
-        )
+        print(f"✅ VPC Created: {vpc_id}")
         
-        return vpc.id, ig.id
+        return vpc_id, ig_id
 
     def create_ecs_cluster(self, cluster_name="king-deepseek-cluster"):
+        from botocore.exceptions import ClientError  # already loaded by boto3 in __init__
         try:
             response = self.ecs.create_cluster(clusterName=cluster_name)
             print(f"✅ ECS Cluster Created: {cluster_name}")
@@ -1,11 +1,13 @@
 # azure_deploy.py
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.containerinstance import ContainerInstanceManagementClient
 import os
 
 class AzureDeployer:
     def __init__(self, subscription_id):
+        # Azure SDKs are heavy; only load them when an Azure deploy actually runs
+        from azure.identity import DefaultAzureCredential
+        from azure.mgmt.resource import ResourceManagementClient
+        from azure.mgmt.containerinstance import ContainerInstanceManagementClient
+        
         self.subscription_id = subscription_id
         self.credential = DefaultAzureCredential()
         self.resource_client = ResourceManagementClient(self.credential, subscription_id)
@@ -1,5 +1,9 @@
+import io
 import os
 import sys
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ==========================================
@@ -7,6 +11,8 @@ from pathlib import Path
 # ==========================================
 
 BASE_DIR = Path("agent50-supreme-cloud")
+# --bundle: write everything into one agent50-supreme-cloud.tar instead of loose files
+BUNDLE = "--bundle" in sys.argv[1:]
 
 print("🚀 AGENT 50: Starting Cloud Structure Generation...")
 print("==================================================")
@@ -27,10 +33,11 @@ directories = [
     "nginx"
 ]
 
-for dir_path in directories:
-    full_path = BASE_DIR / dir_path
-    full_path.mkdir(parents=True, exist_ok=True)
-    print(f"✅ Created Folder: {full_path}")
+# mkdir calls are kernel-bound, so they overlap across threads; report once at the end
+if not BUNDLE:
+    with ThreadPoolExecutor(max_workers=(os.cpu_count() or 4) * 2) as ex:
+        list(ex.map(lambda p: (BASE_DIR / p).mkdir(parents=True, exist_ok=True), directories))
+    print("\n".join(f"✅ Created Folder: {BASE_DIR / dir_path}" for dir_path in directories))
 
 # ==========================================
 # 2. WRITE FILES (The Supreme Codes)
@@ -43,6 +50,7 @@ Optimized for Railway, Render, Vercel with Gunicorn
 """
 import os
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 import secrets
@@ -80,6 +88,10 @@ class ProductionConfig:
         cls.DATA_DIR.mkdir(exist_ok=True, parents=True)
         cls.LOGS_DIR.mkdir(exist_ok=True, parents=True)
 
+# Token lifetime and JWT header are fixed, so build them once
+_EXP_DELTA = 86400  # 24 hours
+_JWT_HEADERS = {'alg': ProductionConfig.JWT_ALGORITHM, 'typ': 'JWT'}
+
 # ========== APPLICATION FACTORY ==========
 def create_app():
     ProductionConfig.ensure_dirs()
@@ -124,7 +136,7 @@ def create_app():
             admin_pass = os.environ.get('AGENT50_ADMIN_PASS', 'supreme_agent50_2024')
             
             if data.get('username') == admin_user and data.get('password') == admin_pass:
-                token = jwt.encode({'user_id': 1, 'username': admin_user, 'role': 'admin', 'exp': datetime.utcnow().timestamp() + (24 * 3600)}, ProductionConfig.JWT_SECRET, algorithm=ProductionConfig.JWT_ALGORITHM)
+                token = jwt.encode({'user_id': 1, 'username': admin_user, 'role': 'admin', 'exp': int(time.time()) + _EXP_DELTA}, ProductionConfig.JWT_SECRET, algorithm=ProductionConfig.JWT_ALGORITHM, headers=_JWT_HEADERS)
                 return jsonify({'status': 'success', 'token': token, 'user': {'username': admin_user, 'full_name': 'ALI MARRI'}, 'agent_name': ProductionConfig.AGENT_NAME})
             else:
                 return jsonify({'error': 'Invalid credentials'}), 401
@@ -323,8 +335,8 @@ f16_content = r'''# 🚀 Agent 50 Supreme Cloud
 Created by ALI MARRI
 '''
 
-# DICTIONARY MAPPING FILES TO CONTENT
-files_to_create = {
+# DICTIONARY MAPPING FILES TO CONTENT (encoded once here, written as raw bytes)
+files_to_create = {path: content.encode("utf-8") for path, content in {
     "backend/app.py": f1_content,
     "backend/requirements.txt": f2_content,
     "backend/gunicorn.conf.py": f3_content,
@@ -340,14 +352,55 @@ files_to_create = {
     "README.md": f16_content,
     "frontend/index.html": "<!DOCTYPE html><html lang='en'><head><title>Agent 50 Supreme</title></head><body><div id='root'></div><script type='module' src='/src/main.tsx'></script></body></html>",
     "frontend/package.json": '{"name":"agent50-cloud","version":"3.0.0","type":"module","scripts":{"dev":"vite","build":"vite build"},"dependencies":{"react":"^18.2.0","react-dom":"^18.2.0","framer-motion":"^10.16.4","axios":"^1.6.2"},"devDependencies":{"vite":"^4.4.5","tailwindcss":"^3.3.3","typescript":"^5.0.2"}}'
-}
+}.items()}
 
 # 3. EXECUTE WRITING
-for path, content in files_to_create.items():
-    full_path = BASE_DIR / path
-    with open(full_path, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"📄 Generated: {path}")
+def _write_bundle(bundle_path):
+    """Same tree as one tar stream: a single open, no mkdir calls (extract when deploying)"""
+    # TarInfo defaults to mtime=0 (1970); stamp every member with the build time
+    mtime = time.time()
+    with tarfile.open(bundle_path, "w") as tf:
+        for dir_path in directories:
+            info = tarfile.TarInfo(name=f"{BASE_DIR.name}/{dir_path}")
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+            info.mtime = mtime
+            tf.addfile(info)
+        for path, content in files_to_create.items():
+            info = tarfile.TarInfo(name=f"{BASE_DIR.name}/{path}")
+            info.size = len(content)
+            info.mode = 0o644
+            info.mtime = mtime
+            tf.addfile(info, io.BytesIO(content))
+
+if BUNDLE:
+    bundle_path = BASE_DIR.with_suffix(".tar")
+    _write_bundle(bundle_path)
+    print(f"📦 Bundled {len(files_to_create)} files into: {bundle_path}")
+
+    print("\n==================================================")
+    print(f"✅ SUCCESS! '{bundle_path}' is READY.")
+    print(f"👉 Next Step: Extract it with 'tar -xf {bundle_path}' where you deploy")
+    print("==================================================")
+    sys.exit(0)
+
+# Parent folders not covered by the directory list above (each created once)
+base_dir = str(BASE_DIR.resolve())
+for parent in {os.path.dirname(os.path.join(base_dir, path)) for path in files_to_create} - {os.path.join(base_dir, d) for d in directories}:
+    os.makedirs(parent, exist_ok=True)
+
+# Contents are already in memory: one os.write per file, no text-mode wrapper
+def _write_one(item):
+    path, content = item
+    fd = os.open(os.path.join(base_dir, path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, content)
+    finally:
+        os.close(fd)
+
+with ThreadPoolExecutor(max_workers=(os.cpu_count() or 4) * 2) as ex:
+    list(ex.map(_write_one, files_to_create.items()))
+print("\n".join(f"📄 Generated: {path}" for path in files_to_create))
 
 print("\n==================================================")
 print("✅ SUCCESS! 'agent50-supreme-cloud' folder is READY.")
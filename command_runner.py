@@ -1,43 +1,74 @@
 from __future__ import annotations
+import hashlib
+import mmap
+import re
+import shlex
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 import os
 
 class CommandRunner:
+    # Top-level imports of the packages install_dependencies knows about (bytes,
+    # so files are scanned without decoding)
+    _DEP_RE = re.compile(rb'^[ \t]*(?:import|from)[ \t]+(flask|requests|numpy)\b', re.MULTILINE)
+    _DEP_COUNT = 3
+    _MMAP_MIN_SIZE = 64 * 1024
+    # Per-project marker: last successfully installed dependency set
+    _PIP_MARKER_DIR = Path.home() / ".cache" / "agent50_pip_done"
+    
     def __init__(self):
         self.base_dir = Path(__file__).parent
         self.projects_dir = self.base_dir / "projects"
-        self.allowed_commands = [
-            "python", "pip", "npm", "node", "git",
-            "echo", "dir", "ls", "cd"
-        ]
+        # Commands run without a shell, so only real executables belong here
+        # (echo/cd/dir Windows par cmd builtins hain)
+        self.allowed_commands = frozenset((
+            "python", "pip", "npm", "node", "git", "ls"
+        ))
     
-    def run_safe_command(self, command: str, project_name: str, cwd: Path = None) -> dict:
+    def run_safe_command(self, command: str | list, project_name: str, cwd: Path = None) -> dict:
         """
         Safe command execution with error handling
+        command: string (shlex se split hota hai) ya seedha argv list
         """
         try:
             # Set working directory
             if not cwd:
                 cwd = self.projects_dir / project_name
             
-            # Basic security check
-            cmd_parts = command.split()
-            if cmd_parts[0] not in self.allowed_commands:
+            # Basic security check (quotes bhi sahi handle hote hain)
+            if isinstance(command, str):
+                cmd_parts = shlex.split(command, posix=os.name != "nt")
+            else:
+                cmd_parts = list(command)
+                command = shlex.join(cmd_parts)
+            if not cmd_parts or cmd_parts[0] not in self.allowed_commands:
                 return {
                     "success": False,
-                    "error": f"Command not allowed: {cmd_parts[0]}",
+                    "error": f"Command not allowed: {cmd_parts[0] if cmd_parts else command}",
+                    "output": ""
+                }
+            
+            # Shell ke bina PATHEXT lookup nahi hota (Windows par npm = npm.cmd), is liye khud resolve.
+            # python = agent ka apna interpreter (jis mein install_dependencies packages daalta hai)
+            if cmd_parts[0] == "python":
+                executable = sys.executable
+            else:
+                executable = shutil.which(cmd_parts[0])
+            if executable is None:
+                return {
+                    "success": False,
+                    "error": f"Command not found: {cmd_parts[0]}",
                     "output": ""
                 }
             
             print(f"🚀 Running: {command}")
             print(f"📁 Directory: {cwd}")
             
-            # Run command
+            # Run command (argv list, koi shell process nahi)
             result = subprocess.run(
-                command,
-                shell=True,
+                [executable] + cmd_parts[1:],
                 cwd=cwd,
                 capture_output=True,
                 text=True,
@@ -64,42 +95,91 @@ class CommandRunner:
                 "output": ""
             }
     
-    def install_dependencies(self, project_name: str) -> dict:
+    @staticmethod
+    def _scan(project_dir: Path) -> tuple:
+        """
+        Ek hi os.scandir pass: (python file names, set of all file names)
+        """
+        python_files = []
+        names = set()
+        try:
+            with os.scandir(project_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        names.add(entry.name)
+                        if entry.name.endswith(".py"):
+                            python_files.append(entry.name)
+        except FileNotFoundError:
+            pass  # project folder hi nahi - khali result (glob jaisa)
+        return python_files, names
+    
+    def install_dependencies(self, project_name: str, scan: tuple = None) -> dict:
         """
         Auto-detect and install Python dependencies
+        scan: pehle se kiya gaya _scan() result (dobara directory scan nahi)
         """
         project_dir = self.projects_dir / project_name
+        python_files, names = scan or self._scan(project_dir)
         
         # Check for requirements.txt
-        requirements_file = project_dir / "requirements.txt"
-        if requirements_file.exists():
-            print("📦 Installing dependencies from requirements.txt...")
-            return self.run_safe_command("pip install -r requirements.txt", project_name)
+        has_requirements = "requirements.txt" in names
         
         # Check for common dependencies in code
-        python_files = list(project_dir.glob("*.py"))
         dependencies = set()
         
-        for py_file in python_files:
-            with open(py_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if "import flask" in content or "from flask" in content:
-                    dependencies.add("flask")
-                if "import requests" in content:
-                    dependencies.add("requests")
-                if "import numpy" in content:
-                    dependencies.add("numpy")
+        for name in python_files:
+            with open(project_dir / name, 'rb') as f:
+                # Bari files mmap se (Python buffer mein copy nahi hoti)
+                if os.fstat(f.fileno()).st_size >= self._MMAP_MIN_SIZE:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                        found = self._DEP_RE.findall(content)
+                else:
+                    found = self._DEP_RE.findall(f.read())
+            dependencies.update(name.decode() for name in found)
+            if len(dependencies) == self._DEP_COUNT:
+                break  # sab mil gayi, baqi files scan karne ki zaroorat nahi
         
-        if dependencies:
-            deps_str = " ".join(dependencies)
-            print(f"📦 Installing detected dependencies: {deps_str}")
-            return self.run_safe_command(f"pip install {deps_str}", project_name)
+        if not (has_requirements or dependencies):
+            return {
+                "success": True,
+                "output": "No dependencies detected to install",
+                "error": ""
+            }
         
-        return {
-            "success": True,
-            "output": "No dependencies detected to install",
-            "error": ""
-        }
+        # requirements.txt + detected imports: ek hi pip process
+        deps = sorted(dependencies)
+        fingerprint = hashlib.sha256(" ".join(deps).encode())
+        if has_requirements:
+            fingerprint.update((project_dir / "requirements.txt").read_bytes())
+        fingerprint = fingerprint.hexdigest()
+        # Marker per project + interpreter: pip wahi interpreter chalata hai (python -m pip)
+        marker = self._PIP_MARKER_DIR / hashlib.sha256(
+            f"{project_dir.resolve()}\0{sys.executable}".encode()
+        ).hexdigest()
+        try:
+            if marker.read_text() == fingerprint:
+                return {
+                    "success": True,
+                    "output": "Dependencies unchanged since last install, skipping pip",
+                    "error": ""
+                }
+        except OSError:
+            pass
+        
+        command = ["python", "-m", "pip", "install", "--disable-pip-version-check", "--no-input"]
+        if has_requirements:
+            command += ["-r", "requirements.txt"]
+        command += deps
+        print(f"📦 Installing dependencies: {' '.join(command[6:])}")
+        result = self.run_safe_command(command, project_name)
+        
+        if result["success"]:
+            try:
+                marker.parent.mkdir(parents=True, exist_ok=True)
+                marker.write_text(fingerprint)
+            except OSError:
+                pass  # marker sirf optimization hai
+        return result
     
     def test_project(self, project_name: str) -> dict:
         """
@@ -108,7 +188,8 @@ class CommandRunner:
         project_dir = self.projects_dir / project_name
         
         # Try to find main Python file
-        python_files = list(project_dir.glob("*.py"))
+        scan = self._scan(project_dir)
+        python_files, names = scan
         if not python_files:
             return {
                 "success": False,
@@ -117,24 +198,17 @@ class CommandRunner:
             }
         
         # Try app.py, main.py, or first Python file
-        main_file = None
-        for preferred in ["app.py", "main.py"]:
-            if (project_dir / preferred).exists():
-                main_file = preferred
-                break
-        
-        if not main_file:
-            main_file = python_files[0].name
+        main_file = next((preferred for preferred in ("app.py", "main.py") if preferred in names), python_files[0])
         
         print(f"🧪 Testing project: {main_file}")
         
         # First install dependencies
-        install_result = self.install_dependencies(project_name)
+        install_result = self.install_dependencies(project_name, scan)
         if not install_result["success"]:
             return install_result
         
         # Try to run the Python file
-        return self.run_safe_command(f"python {main_file}", project_name)
+        return self.run_safe_command(["python", main_file], project_name)
 
 def main():
     runner = CommandRunner()
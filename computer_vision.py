@@ -6,23 +6,121 @@ from PIL import Image
 import io
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import jsonify, request
 
+# Optional: orjson for the CV endpoint responses (NumPy values serialized natively)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: Numba JIT for the single-pass mean color reducer
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# ASCII characters (from dark to light), expanded to a 256-entry table keyed by
+# the raw pixel value (entry p is the character for p >> 5)
+_ASCII_LUT = np.frombuffer(b'@%#*+=-:. ', dtype='S1')
+_ASCII_LUT256 = _ASCII_LUT[np.arange(256) >> 5].copy()
+
+def _mean_rgb_numpy(img):
+    """Per-channel mean of an HxWx3 uint8 image (float64 accumulator, no float32 copy)"""
+    return img.reshape(-1, 3).mean(axis=0)
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mean_rgb(img):
+        """Per-channel mean of an HxWx3 uint8 image in one streaming pass"""
+        height, width = img.shape[0], img.shape[1]
+        r = np.uint64(0)
+        g = np.uint64(0)
+        b = np.uint64(0)
+        for i in prange(height):
+            for j in range(width):
+                r += img[i, j, 0]
+                g += img[i, j, 1]
+                b += img[i, j, 2]
+        n = height * width
+        return np.array((r / n, g / n, b / n))
+else:
+    _mean_rgb = _mean_rgb_numpy
+
+# Debug artifacts are written off the request thread
+_DEBUG_WRITER = ThreadPoolExecutor(max_workers=1)
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
 class ComputerVision:
-    def __init__(self):
+    def __init__(self, save_debug=False):
         self.uploads_dir = 'cv_uploads'
+        self.save_debug = save_debug  # default for process_image's save_edges
         os.makedirs(self.uploads_dir, exist_ok=True)
         
-    def process_image(self, image_data):
-        """Process uploaded image for basic computer vision"""
+        # OpenCV SIMD + parallel_for_ paths for the cascade and Canny kernels
+        cv2.setUseOptimized(True)
+        cv2.setNumThreads(os.cpu_count() or 4)
+        # Integer Canny thresholds (process_image)
+        self._canny_lo, self._canny_hi = 100, 200
+        # Per-thread scratch buffers (gray, edges), reused while image sizes match
+        self._scratch = threading.local()
+        
+        # Face cascade XML is parsed once, not on every request
+        self._haar_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.face_cascade = cv2.CascadeClassifier(self._haar_path)
+    
+    @staticmethod
+    def _strip_data_url(image_data):
+        """Base64 payload after a 'data:...;base64,' prefix (one find, no split list)"""
+        comma = image_data.find(',')
+        return image_data[comma + 1:] if comma >= 0 else image_data
+    
+    @classmethod
+    def _image_bytes(cls, image_data):
+        """
+        Raw upload bytes: multipart bytes pass through unchanged, base64 strings
+        (optionally a data URL) are decoded for backwards compatibility
+        """
+        if isinstance(image_data, (bytes, bytearray, memoryview)):
+            return image_data
+        return base64.b64decode(cls._strip_data_url(image_data))
+    
+    @staticmethod
+    def _decode_bgr(image_bytes, flags=cv2.IMREAD_COLOR):
+        """Decode straight to a BGR array (or grayscale with IMREAD_GRAYSCALE) in one copy"""
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flags)
+        if image is None:
+            raise ValueError("Could not decode image data")
+        return image
+        
+    def _scratch_buffer(self, name, shape):
+        """This thread's uint8 buffer `name`, reallocated only when the shape changes"""
+        buf = getattr(self._scratch, name, None)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, np.uint8)
+            setattr(self._scratch, name, buf)
+        return buf
+    
+    def _to_gray(self, bgr):
+        """BGR -> grayscale into the reused per-thread buffer"""
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY, dst=self._scratch_buffer('gray', bgr.shape[:2]))
+    
+    def process_image(self, image_data, save_edges=None):
+        """
+        Process uploaded image for basic computer vision
+        save_edges: also write the Canny edge map to cv_uploads (defaults to self.save_debug)
+        """
         try:
             # Decode base64 image
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
-            
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = self._image_bytes(image_data)
+            cv_image = self._decode_bgr(image_bytes)
+            # PIL only reads the header here (format/mode), no pixel decode
             image = Image.open(io.BytesIO(image_bytes))
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
             
             # Basic image analysis
             height, width, channels = cv_image.shape
@@ -36,19 +134,21 @@ class ComputerVision:
             }
             
             # Edge detection
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            edges = cv2.Canny(gray, 100, 200)
+            gray = self._to_gray(cv_image)
+            edges = cv2.Canny(gray, self._canny_lo, self._canny_hi, edges=self._scratch_buffer('edges', gray.shape))
             
-            # Color analysis
-            colors = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
-            dominant_color = self.get_dominant_color(colors)
+            # Color analysis (straight on the BGR pixels, no RGB copy)
+            dominant_color = self.get_dominant_color(cv_image, bgr=True)
             
             analysis['edge_detection'] = True
             analysis['dominant_color_rgb'] = dominant_color
             
             # Save processed image
-            processed_path = os.path.join(self.uploads_dir, 'processed_edges.jpg')
-            cv2.imwrite(processed_path, edges)
+            if self.save_debug if save_edges is None else save_edges:
+                # Encode in memory; the file write does not block the response
+                processed_path = os.path.join(self.uploads_dir, 'processed_edges.jpg')
+                _, encoded = cv2.imencode('.jpg', edges, [cv2.IMWRITE_JPEG_QUALITY, 80])
+                _DEBUG_WRITER.submit(_write_file, processed_path, encoded.tobytes())
             
             return {'status': 'success', 'analysis': analysis}
             
@@ -56,48 +156,45 @@ class ComputerVision:
             logging.error(f"CV Processing Error: {e}")
             return {'status': 'error', 'message': str(e)}
     
-    def get_dominant_color(self, image, k=1):
-        """Extract dominant color from image"""
+    def get_dominant_color(self, image, k=1, bgr=False):
+        """Extract dominant color from image (bgr=True: BGR input, RGB result)"""
         try:
-            pixels = image.reshape(-1, 3)
-            pixels = np.float32(pixels)
+            # k=1 k-means is just the mean color: one pass, no float32 copy
+            if k == 1:
+                color = [int(c) for c in _mean_rgb(np.ascontiguousarray(image, dtype=np.uint8))]
+                return color[::-1] if bgr else color
             
-            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
-            _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+            # Cluster a 64x64 area-averaged thumbnail (4096 pixels) instead of every pixel
+            small = cv2.resize(image, (64, 64), interpolation=cv2.INTER_AREA)
+            pixels = np.float32(small.reshape(-1, 3))
             
-            dominant_color = centers[0].astype(int)
-            return dominant_color.tolist()
+            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+            _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+            
+            # Dominant = the center with the most pixels assigned to it
+            dominant_color = centers[np.bincount(labels.ravel(), minlength=k).argmax()].astype(int)
+            return (dominant_color[::-1] if bgr else dominant_color).tolist()
         except:
             return [0, 0, 0]
     
     def detect_faces(self, image_data):
         """Simple face detection"""
         try:
-            # Decode image
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
+            # Decode image (the cascade only needs grayscale)
+            gray = self._decode_bgr(self._image_bytes(image_data), cv2.IMREAD_GRAYSCALE)
             
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Load face cascade
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
             
+            # One C-level tolist() gives plain ints (an empty result is a bare tuple)
+            rows = faces.tolist() if len(faces) else []
             result = {
-                'faces_detected': len(faces),
-                'face_locations': []
+                'faces_detected': len(rows),
+                'face_locations': [
+                    {'x': x, 'y': y, 'width': w, 'height': h}
+                    for x, y, w, h in rows
+                ]
             }
             
-            for (x, y, w, h) in faces:
-                result['face_locations'].append({
-                    'x': int(x), 'y': int(y), 
-                    'width': int(w), 'height': int(h)
-                })
-            
             return {'status': 'success', 'result': result}
             
         except Exception as e:
@@ -106,29 +203,21 @@ class ComputerVision:
     def image_to_ascii(self, image_data, width=100):
         """Convert image to ASCII art"""
         try:
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
+            # Decode directly as grayscale
+            gray = self._decode_bgr(self._image_bytes(image_data), cv2.IMREAD_GRAYSCALE)
             
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to grayscale
-            image = image.convert('L')
-            
-            # Resize
-            height = int(width * image.height / image.width)
-            image = image.resize((width, height))
+            # Resize (INTER_AREA averages source pixels, suited to downscaling)
+            h, w = gray.shape
+            height = int(width * h / w)
+            gray_small = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
             
-            # ASCII characters (from dark to light)
-            ascii_chars = '@%#*+=-:. '
-            
-            # Convert to ASCII
-            pixels = image.getdata()
-            ascii_str = ''
-            for i, pixel in enumerate(pixels):
-                ascii_str += ascii_chars[pixel // 32]
-                if (i + 1) % width == 0:
-                    ascii_str += '\n'
+            # Convert to ASCII: one table lookup per pixel into a buffer with
+            # an extra newline column, so every row ends with '\n'
+            h, w = gray_small.shape
+            out = np.empty((h, w + 1), dtype='S1')
+            np.take(_ASCII_LUT256, gray_small, out=out[:, :w])
+            out[:, w] = b'\n'
+            ascii_str = out.tobytes().decode('ascii')
             
             return {'status': 'success', 'ascii_art': ascii_str}
             
@@ -136,24 +225,36 @@ class ComputerVision:
             return {'status': 'error', 'message': str(e)}
 
 # Flask routes integration
+def _request_image():
+    """Uploaded image: raw bytes from multipart/form-data, else the JSON base64 field"""
+    upload = request.files.get('image')
+    if upload is not None:
+        return upload.read()
+    data = request.get_json(silent=True) or {}
+    return data.get('image', '')
+
 def setup_cv_routes(app, cv_system):
+    def _json_response(result):
+        """orjson-encoded response for the CV endpoints only; the app's JSON provider is left alone"""
+        if orjson is None:
+            return jsonify(result)
+        return app.response_class(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY),
+                                  mimetype='application/json')
+    
     @app.route('/api/cv/analyze', methods=['POST'])
     def analyze_image():
-        data = request.get_json()
-        image_data = data.get('image', '')
+        image_data = _request_image()
         result = cv_system.process_image(image_data)
-        return jsonify(result)
+        return _json_response(result)
     
     @app.route('/api/cv/faces', methods=['POST'])
     def detect_faces():
-        data = request.get_json()
-        image_data = data.get('image', '')
+        image_data = _request_image()
         result = cv_system.detect_faces(image_data)
-        return jsonify(result)
+        return _json_response(result)
     
     @app.route('/api/cv/ascii', methods=['POST'])
     def image_to_ascii():
-        data = request.get_json()
-        image_data = data.get('image', '')
+        image_data = _request_image()
         result = cv_system.image_to_ascii(image_data)
-        return jsonify(result)
\ No newline at end of file
+        return _json_response(result)
\ No newline at end of file
@@ -24,9 +24,23 @@ sys.path.append(os.path.dirname(__file__))
 # Database Integration - KING DEEPSEEK AI Agent
 from models import init_database, get_db_session
 from crud_operations import UserCRUD, ProjectCRUD, get_database_stats
+from extensions import ORJSONProvider
 
 app = Flask(__name__)
 app.secret_key = 'king_deepseek_secret_2025'
+# orjson available ho to jsonify usi se (tez encoding)
+if ORJSONProvider:
+    app.json = ORJSONProvider(app)
+
+# DB list routes page size (?limit=&offset=)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _page_args():
+    """(limit, offset) from the query string, clamped"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)
 
 class WebAgent:
     def __init__(self):
@@ -139,39 +153,42 @@ def db_stats():
 
 @app.route('/api/users')
 def get_users():
-    """Get all users"""
+    """Get users (paginated, listed columns only)"""
     try:
-        user_crud = UserCRUD()
-        users = user_crud.get_all()
-        user_list = []
-        for u in users:
-            user_list.append({
-                "id": u.id, 
-                "username": u.username, 
-                "email": u.email,
-                "created_at": str(u.created_at) if u.created_at else None
-            })
-        return jsonify({"success": True, "users": user_list})
+        limit, offset = _page_args()
+        users = UserCRUD.get_page(limit, offset)
+        user_list = [
+            {
+                "id": user_id,
+                "username": username,
+                "email": email,
+                # Explicit ISO-8601 - wire format JSON provider (orjson ya default) par depend na kare
+                "created_at": created_at.isoformat() if created_at else None
+            }
+            for user_id, username, email, created_at in users
+        ]
+        return jsonify({"success": True, "users": user_list, "limit": limit, "offset": offset})
     except Exception as e:
         print(f"Users API error: {e}")
         return jsonify({"success": False, "error": "Could not fetch users"}), 500
 
-@app.route('/api/projects')
+@app.route('/api/db/projects')
 def get_projects():
-    """Get all projects"""
+    """Get projects (paginated, listed columns only)"""
     try:
-        project_crud = ProjectCRUD()
-        projects = project_crud.get_all()
-        project_list = []
-        for p in projects:
-            project_list.append({
-                "id": p.id,
-                "name": p.name,
-                "description": p.description,
-                "project_type": p.project_type,
-                "status": p.status
-            })
-        return jsonify({"success": True, "projects": project_list})
+        limit, offset = _page_args()
+        projects = ProjectCRUD.get_page(limit, offset)
+        project_list = [
+            {
+                "id": project_id,
+                "name": name,
+                "description": description,
+                "project_type": project_type,
+                "status": status
+            }
+            for project_id, name, description, project_type, status in projects
+        ]
+        return jsonify({"success": True, "projects": project_list, "limit": limit, "offset": offset})
     except Exception as e:
         print(f"Projects API error: {e}")
         return jsonify({"success": False, "error": "Could not fetch projects"}), 500
@@ -374,7 +391,7 @@ def create_default_templates():
 
         async function loadProjects() {
             try {
-                const response = await fetch('/api/projects');
+                const response = await fetch('/api/db/projects');
                 const result = await response.json();
                 document.getElementById('dbInfo').innerHTML = JSON.stringify(result, null, 2);
             } catch (error) {
@@ -408,7 +425,7 @@ if __name__ == '__main__':
     print("=== 🌐 KING DEEPSEEK WEB INTERFACE ===")
     print("Starting web server...")
     print("Access at: http://localhost:5000")
-    print("Database routes: /api/db/stats, /api/users, /api/projects")
+    print("Database routes: /api/db/stats, /api/users, /api/db/projects")
     print("Press Ctrl+C to stop")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
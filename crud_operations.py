@@ -1,19 +1,46 @@
+import time
+from sqlalchemy import func, select
 from extensions import db
 from models import User, Project, File, ApiLog
 
+# Dashboard stats snapshot; repeated refreshes within the TTL skip the COUNT scans
+STATS_CACHE_TTL = 3.0
+_stats_cache = {"ts": 0.0, "val": None}
+
+def invalidate_stats_cache():
+    _stats_cache["ts"] = 0.0
+
 class UserCRUD:
     @staticmethod
-    def create_user(username, email, password, role='customer'):
+    def create_user(username, email, password, role='customer', commit=True):
+        """commit=False only flushes (id assigned) so the caller can batch several into one transaction"""
         try:
             new_user = User(username=username, email=email, role=role)
             new_user.set_password(password)
             db.session.add(new_user)
-            db.session.commit()
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
+            invalidate_stats_cache()
             return new_user
         except Exception as e:
             db.session.rollback()
             raise e
 
+    @staticmethod
+    def bulk_create_users(mappings, commit=True):
+        """Import path: dicts with password_hash already computed, inserted without the unit of work"""
+        try:
+            db.session.bulk_insert_mappings(User, mappings)
+            if commit:
+                db.session.commit()
+            invalidate_stats_cache()
+            return len(mappings)
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
     @staticmethod
     def get_user_by_email(email):
         return User.query.filter_by(email=email).first()
@@ -22,13 +49,35 @@ class UserCRUD:
     def get_user_by_id(user_id):
         return User.query.get(int(user_id))
 
+    @staticmethod
+    def get_summary(user_id):
+        """(id, username, email, is_admin, created_at) row without loading the full User"""
+        return db.session.query(
+            User.id, User.username, User.email, User.is_admin, User.created_at
+        ).filter(User.id == int(user_id)).first()
+
+    @staticmethod
+    def get_page(limit=100, offset=0):
+        """(id, username, email, created_at) rows, newest first, one page at a time"""
+        return db.session.query(
+            User.id, User.username, User.email, User.created_at
+        ).order_by(User.id.desc()).limit(limit).offset(offset).all()
+
 class ProjectCRUD:
+    @staticmethod
+    def get_page(limit=100, offset=0):
+        """(id, name, description, project_type, status) rows, newest first, one page at a time"""
+        return db.session.query(
+            Project.id, Project.name, Project.description, Project.project_type, Project.status
+        ).order_by(Project.id.desc()).limit(limit).offset(offset).all()
+
     @staticmethod
     def create_project(name, user_id, description=None):
         try:
             project = Project(name=name, user_id=user_id, description=description)
             db.session.add(project)
             db.session.commit()
+            invalidate_stats_cache()
             return project
         except Exception as e:
             db.session.rollback()
@@ -46,11 +95,19 @@ class ProjectCRUD:
             raise e
 
 def get_database_stats():
+    now = time.monotonic()
+    if _stats_cache["val"] is not None and now - _stats_cache["ts"] < STATS_CACHE_TTL:
+        return _stats_cache["val"]
     try:
-        return {
-            "users": User.query.count(),
-            "projects": Project.query.count(),
-            "logs": ApiLog.query.count()
-        }
+        # All three COUNTs as scalar subqueries of one SELECT (single round trip)
+        users, projects, logs = db.session.execute(select(
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(Project.id)).scalar_subquery(),
+            select(func.count(ApiLog.id)).scalar_subquery()
+        )).one()
+        stats = {"users": users, "projects": projects, "logs": logs}
+        _stats_cache["val"] = stats
+        _stats_cache["ts"] = now
+        return stats
     except:
         return {"users": 0, "projects": 0, "logs": 0}
\ No newline at end of file
@@ -7,6 +7,26 @@ from flask_bootstrap import Bootstrap
 from flask_moment import Moment
 from flask_cors import CORS
 
+# Fast JSON encoding (orjson) - install with app.json = ORJSONProvider(app)
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class ORJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson (handles datetime natively)"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(
+                obj,
+                default=self.default,
+                option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+except ImportError:
+    ORJSONProvider = None
+
 # Initialize Plugins
 db = SQLAlchemy()
 login_manager = LoginManager()
@@ -4,6 +4,7 @@ import json
 from pathlib import Path
 import subprocess
 import sys
+import time
 
 # Add agent modules to path
 sys.path.append(os.path.dirname(__file__))
@@ -20,6 +21,10 @@ except ImportError:
 app = Flask(__name__)
 app.secret_key = 'king_deepseek_secret_2025'
 
+# Projects list cache (per process): '/' aur '/api/projects' har request par disk scan na karein
+PROJECTS_CACHE_TTL = 5.0  # seconds
+_projects_cache = {"ts": 0.0, "data": None}
+
 class WebAgent:
     def __init__(self):
         self.base_dir = Path(__file__).parent
@@ -37,32 +42,78 @@ class WebAgent:
             self.error_handler = ErrorHandler()
     
     def get_projects_list(self):
-        """Get list of all generated projects"""
+        """Get list of all generated projects (cached for PROJECTS_CACHE_TTL seconds)"""
+        now = time.monotonic()
+        if _projects_cache["data"] is not None and now - _projects_cache["ts"] < PROJECTS_CACHE_TTL:
+            return _projects_cache["data"]
+        projects = self._scan_projects()
+        _projects_cache["ts"], _projects_cache["data"] = now, projects
+        return projects
+    
+    @staticmethod
+    def invalidate_projects_cache():
+        """Next get_projects_list call rescans the projects folder"""
+        _projects_cache["data"] = None
+    
+    def _scan_projects(self):
+        """Projects folder scan (uncached)"""
         projects = []
-        if self.projects_dir.exists():
-            for project_dir in self.projects_dir.iterdir():
-                if project_dir.is_dir():
+        try:
+            entries = os.scandir(self.projects_dir)
+        except FileNotFoundError:
+            return projects
+        # Outer and per-project scandir: no Path objects, stat from the DirEntry
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Scan ke dauran delete/permission wala folder poori list ko 500 na banaye
+                    try:
+                        with os.scandir(entry.path) as project_entries:
+                            py_files = sum(1 for e in project_entries if e.name.endswith(".py"))
+                    except OSError:
+                        py_files = 0
+                    try:
+                        created = entry.stat().st_ctime
+                    except OSError:
+                        continue  # folder ab maujood hi nahi
                     projects.append({
-                        "name": project_dir.name,
-                        "path": str(project_dir),
-                        "files": len(list(project_dir.glob("*.py"))),
-                        "created": project_dir.stat().st_ctime
+                        "name": entry.name,
+                        "path": entry.path,
+                        "files": py_files,
+                        "created": created
                     })
         return sorted(projects, key=lambda x: x["created"], reverse=True)
     
     def get_project_files(self, project_name):
         """Get all files in a project"""
-        project_dir = self.projects_dir / project_name
+        project_dir = str(self.projects_dir / project_name)
         files = []
-        if project_dir.exists():
-            for file_path in project_dir.rglob("*"):
-                if file_path.is_file():
-                    files.append({
-                        "name": file_path.name,
-                        "path": str(file_path.relative_to(project_dir)),
-                        "size": file_path.stat().st_size,
-                        "type": "file"
-                    })
+        # os.scandir DFS (explicit stack): DirEntry type/stat come from the scan
+        # itself, relative paths are built from the known prefix
+        stack = [(project_dir, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            # Unreadable/deleted folder ya file skip (rglob ki tarah), poora response 500 nahi
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    relative_path = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, relative_path + os.sep))
+                    elif entry.is_file(follow_symlinks=False):
+                        try:
+                            size = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+                        files.append({
+                            "name": entry.name,
+                            "path": relative_path,
+                            "size": size,
+                            "type": "file"
+                        })
         return files
 
 web_agent = WebAgent()
@@ -103,6 +154,7 @@ def api_create_project():
             result = web_agent.multi_agent.generate_complete_project(
                 project_name, template, project_desc
             )
+            web_agent.invalidate_projects_cache()
             return jsonify(result)
         except Exception as e:
             return jsonify({"success": False, "error": str(e)})
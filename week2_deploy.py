@@ -96,6 +96,7 @@ cart_code = '''"""
 Shopping cart and checkout management
 """
 from flask import session
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models import Cart, CartItem, Product, Order, OrderItem
 
@@ -129,7 +130,9 @@ class CartManager:
         cart = Cart.query.get(cart_id)
         if not cart or cart.status != 'active': raise ValueError("Invalid cart")
         
-        total_amount = sum(item.price * item.quantity for item in cart.items)
+        # Items + products ek hi SELECT mein (har item par alag query nahi)
+        items = CartItem.query.options(joinedload(CartItem.product)).filter_by(cart_id=cart_id).all()
+        total_amount = sum(item.price * item.quantity for item in items)
         order = Order(
             customer_id=user_id,
             total_amount=total_amount,
@@ -137,14 +140,15 @@ class CartManager:
             status='pending_payment'
         )
         db.session.add(order)
+        db.session.flush()  # order.id chahiye
         
-        for cart_item in cart.items:
-            order_item = OrderItem(order_id=order.id, product_id=cart_item.product_id, quantity=cart_item.quantity, price=cart_item.price)
-            db.session.add(order_item)
-            
-            product = Product.query.get(cart_item.product_id)
+        order_item_rows = []
+        for cart_item in items:
+            order_item_rows.append({'order_id': order.id, 'product_id': cart_item.product_id, 'quantity': cart_item.quantity, 'price': cart_item.price})
+            product = cart_item.product
             if product.stock_quantity is not None:
                 product.stock_quantity -= cart_item.quantity
+        db.session.bulk_insert_mappings(OrderItem, order_item_rows)
         
         cart.status = 'converted'
         cart.order_id = order.id
@@ -394,6 +398,7 @@ class CartItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'))
     quantity = db.Column(db.Integer)
     price = db.Column(db.Float)
+    product = db.relationship('Product')
 '''
 
 # ==========================================
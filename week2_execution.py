@@ -170,6 +170,7 @@ Shopping cart and checkout management
 """
 
 from flask import session
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models import Cart, CartItem, Product, Order, OrderItem
 from datetime import datetime
@@ -229,8 +230,11 @@ class CartManager:
         if not cart or cart.status != 'active':
             raise ValueError("Invalid cart")
         
+        # Cart items aur unke products ek hi JOIN query mein (N+1 se bachao)
+        items = CartItem.query.options(joinedload(CartItem.product)).filter_by(cart_id=cart_id).all()
+        
         # Calculate totals
-        total_amount = sum(item.price * item.quantity for item in cart.items)
+        total_amount = sum(item.price * item.quantity for item in items)
         
         # Create order
         order = Order(
@@ -240,24 +244,29 @@ class CartManager:
             status='pending_payment'
         )
         db.session.add(order)
+        db.session.flush()  # order.id assign ho jaye
         
         # Convert cart items to order items
-        for cart_item in cart.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                price=cart_item.price
-            )
-            db.session.add(order_item)
+        order_item_rows = []
+        for cart_item in items:
+            order_item_rows.append({
+                'order_id': order.id,
+                'product_id': cart_item.product_id,
+                'quantity': cart_item.quantity,
+                'price': cart_item.price
+            })
             
-            # Update product stock
-            product = Product.query.get(cart_item.product_id)
+            # Update product stock (product pehle se loaded hai)
+            product = cart_item.product
             if product.stock_quantity is not None:
                 if product.stock_quantity < cart_item.quantity:
+                    db.session.rollback()
                     raise ValueError(f"Insufficient stock for {product.name}")
                 product.stock_quantity -= cart_item.quantity
         
+        # Saare order items ek batch INSERT mein
+        db.session.bulk_insert_mappings(OrderItem, order_item_rows)
+        
         # Mark cart as converted
         cart.status = 'converted'
         cart.order_id = order.id
@@ -703,6 +712,8 @@ class CartItem(db.Model):
     cached_price = db.Column(db.Float)
     cached_product_name = db.Column(db.String(200))
     
+    product = db.relationship('Product')
+    
 class Notification(db.Model):
     __tablename__ = 'notification'
     id = db.Column(db.Integer, primary_key=True)